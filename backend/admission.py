@@ -0,0 +1,173 @@
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+from starlette.exceptions import HTTPException
+
+
+# -------------------------------
+#  LIMITS + METRICS
+# -------------------------------
+@dataclass(frozen=True)
+class EndpointLimit:
+    """
+    Admission settings for one endpoint.
+        max_concurrent: requests allowed to run at once
+        max_queue:      requests allowed to wait for a slot; beyond this → 429
+        queue_timeout:  seconds a queued request waits before → 503
+        max_body_bytes: request bodies larger than this → 413
+    """
+    max_concurrent: int
+    max_queue: int
+    queue_timeout: float
+    max_body_bytes: int
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.admitted = 0
+        self.active = 0
+        self.waiting = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.rejected_too_large = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.queue_wait_total += seconds
+        self.queue_wait_max = max(self.queue_wait_max, seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "admitted": self.admitted,
+            "active": self.active,
+            "waiting": self.waiting,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "rejected_too_large": self.rejected_too_large,
+            "queue_wait_avg_ms": round(self.queue_wait_total / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 2),
+        }
+
+
+class BodyTooLarge(HTTPException):
+    """Raised from receive() mid-stream; FastAPI re-raises HTTPExceptions from body parsing."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+
+
+# -------------------------------
+#  ASGI MIDDLEWARE
+# -------------------------------
+class AdmissionControlMiddleware:
+    """
+    Per-endpoint concurrency limits and body-size caps, enforced before
+    FastAPI reads or parses the request body.
+
+    Requests over the cap get 413. When all slots are busy a request waits
+    in a bounded queue; a full queue returns 429 and a queue wait past
+    `queue_timeout` returns 503, both with Retry-After.
+    """
+
+    def __init__(self, app, limits: Dict[str, EndpointLimit], metrics: Dict[str, EndpointMetrics]):
+        self.app = app
+        self.limits = limits
+        self.metrics = metrics
+        self.semaphores = {path: asyncio.Semaphore(limit.max_concurrent) for path, limit in limits.items()}
+        for path in limits:
+            metrics.setdefault(path, EndpointMetrics())
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path")
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS" or path not in self.limits:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits[path]
+        metrics = self.metrics[path]
+
+        # --- Size cap from the declared length, before any body bytes are read ---
+        content_length = dict(scope.get("headers") or []).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit.max_body_bytes:
+            metrics.rejected_too_large += 1
+            await reject(send, 413, f"Request body exceeds {limit.max_body_bytes} bytes")
+            return
+
+        # --- Concurrency slot, with a bounded wait queue ---
+        semaphore = self.semaphores[path]
+        retry_after = max(1, math.ceil(limit.queue_timeout))
+        wait_start = time.perf_counter()
+        if semaphore.locked():
+            if metrics.waiting >= limit.max_queue:
+                metrics.shed_queue_full += 1
+                await reject(send, 429, "Server busy, retry later", retry_after)
+                return
+            metrics.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=limit.queue_timeout)
+            except asyncio.TimeoutError:
+                metrics.shed_timeout += 1
+                await reject(send, 503, "Server busy, retry later", retry_after)
+                return
+            finally:
+                metrics.waiting -= 1
+        else:
+            await semaphore.acquire()
+
+        metrics.admitted += 1
+        metrics.active += 1
+        metrics.record_wait(time.perf_counter() - wait_start)
+        tracked_send = track_start(send)
+        try:
+            await self.app(scope, limited_receive(receive, limit.max_body_bytes, metrics), tracked_send)
+        except BodyTooLarge as e:
+            # Only reached if the body is read outside FastAPI's request parsing
+            if not tracked_send.started:
+                await reject(send, 413, e.detail)
+        finally:
+            metrics.active -= 1
+            semaphore.release()
+
+
+def limited_receive(receive, max_bytes: int, metrics: EndpointMetrics):
+    """Enforce the body cap while streaming, for chunked uploads with no Content-Length."""
+    received = 0
+
+    async def wrapped():
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                metrics.rejected_too_large += 1
+                raise BodyTooLarge(max_bytes)
+        return message
+
+    return wrapped
+
+
+def track_start(send):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            wrapped.started = True
+        await send(message)
+
+    wrapped.started = False
+    return wrapped
+
+
+async def reject(send, status: int, detail: str, retry_after: int = None):
+    body = json.dumps({"detail": detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
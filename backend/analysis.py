@@ -1,11 +1,44 @@
 import pandas as pd
 import numpy as np
 
-def analyze_financial_file(df: pd.DataFrame):
+# Number of anomalies returned inline with the analysis
+ANOMALY_TOP_K = 20
+ANOMALY_ISSUE = "Unusually high expense detected"
+
+
+def detect_anomalies(df: pd.DataFrame):
+    """
+    Rows whose expense is more than 2 standard deviations above the mean.
+    Returns (row_indices, expense_values) as numpy arrays in row order.
+    """
+    expense = df["expense"].to_numpy(dtype=float)
+    expense_threshold = float(df["expense"].mean() + 2 * df["expense"].std())
+    rows = np.flatnonzero(expense > expense_threshold)
+    return rows, expense[rows]
+
+
+def anomaly_items(rows, values):
+    """Serialize anomaly arrays into the public list-of-dicts format."""
+    return [
+        {"row": int(row), "expense": float(value), "issue": ANOMALY_ISSUE}
+        for row, value in zip(rows, values)
+    ]
+
+
+def top_k_anomalies(rows, values, k: int = ANOMALY_TOP_K):
+    """The k largest expense spikes, highest first."""
+    order = np.argsort(-values, kind="stable")[:k]
+    return anomaly_items(rows[order], values[order])
+
+
+def analyze_financial_file(df: pd.DataFrame, top_k: int = ANOMALY_TOP_K, anomalies=None):
     """
     Advanced financial analysis for NGO datasets.
     Expected columns in CSV:
         income, expense, donations (at minimum)
+
+    `anomalies` may be passed in as the result of detect_anomalies(df)
+    to avoid recomputing it when the caller also persists the full list.
     """
 
     # --- BASIC AGGREGATES ---
@@ -33,16 +66,13 @@ def analyze_financial_file(df: pd.DataFrame):
 
 
     # --- ANOMALY DETECTION (Simple rule-based) ---
-    anomalies = []
-    expense_threshold = float(df["expense"].mean() + 2 * df["expense"].std())
-
-    for idx, value in enumerate(df["expense"]):
-        if value > expense_threshold:
-            anomalies.append({
-                "row": int(idx),
-                "expense": float(value),
-                "issue": "Unusually high expense detected"
-            })
+    # Only the top-K spikes go into the response; the full list is paged
+    # separately (see /uploads/{upload_id}/anomalies).
+    if anomalies is None:
+        anomalies = detect_anomalies(df)
+    anomaly_rows, anomaly_values = anomalies
+    anomaly_count = int(len(anomaly_rows))
+    top_anomalies = top_k_anomalies(anomaly_rows, anomaly_values, top_k)
 
 
     # --- FINANCIAL STABILITY SCORE (0–100) ---
@@ -68,19 +98,33 @@ def analyze_financial_file(df: pd.DataFrame):
         "donation_dependency_percent": donation_dependency,
         "expense_volatility": expense_volatility,
         "stability_score": stability_score,
-        "anomalies": anomalies,
+        "anomalies": top_anomalies,
+        "anomaly_count": anomaly_count,
+        "anomalies_truncated": anomaly_count > len(top_anomalies),
         "summary": generate_summary(
             surplus,
             burn_rate,
             donation_dependency,
             stability_score,
-            len(anomalies)
+            anomaly_count
         )
     }
 
     return insights
 
 
+def json_safe(insights):
+    """
+    Copy of the insights for API responses: NaN/inf (e.g. volatility of a
+    single row) are not valid JSON, so they are reported as null. Persist
+    the raw insights, not this copy.
+    """
+    return {
+        key: None if isinstance(value, float) and not np.isfinite(value) else value
+        for key, value in insights.items()
+    }
+
+
 
 def generate_summary(surplus, burn_rate, donation_dependency, stability_score, anomalies_count):
     """
@@ -0,0 +1,92 @@
+"""
+Benchmark the upload ingestion path against plain pandas parsing.
+
+Generates a wide CSV (many unused columns), a large CSV (many rows) and
+an Excel sheet, then times:
+    - baseline: pd.read_csv / pd.read_excel with no dtype or column selection
+    - typed:    ingest.load_financial_file (header check + usecols + float64)
+    - cached:   second Excel load served from the content-hash cache
+
+Usage:
+    python bench_ingest.py [--rows 1000000] [--wide-cols 300] [--excel-rows 20000]
+"""
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ingest
+
+
+def make_frame(rows: int, extra_cols: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {
+        "income": rng.integers(50_000, 150_000, rows),
+        "expense": rng.integers(40_000, 140_000, rows),
+        "donations": rng.integers(5_000, 40_000, rows),
+    }
+    for i in range(extra_cols):
+        data[f"extra_{i}"] = rng.random(rows)
+    return pd.DataFrame(data)
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_csv(label: str, path: Path, repeat: int) -> None:
+    content = path.read_bytes()
+    baseline = timed(lambda: pd.read_csv(io.BytesIO(content)), repeat)
+    typed = timed(lambda: ingest.load_financial_file(path.name, io.BytesIO(content)), repeat)
+    print(f"{label:<12} {len(content) / 1e6:>8.1f} MB  baseline {baseline:>7.3f}s  "
+          f"typed {typed:>7.3f}s  speedup x{baseline / typed:.1f}")
+
+
+def bench_excel(path: Path, repeat: int) -> None:
+    content = path.read_bytes()
+    baseline = timed(lambda: pd.read_excel(io.BytesIO(content)), repeat)
+    typed = timed(lambda: ingest.read_excel_typed(content, use_cache=False), repeat)
+    ingest.read_excel_typed(content)  # warm the cache
+    cached = timed(lambda: ingest.read_excel_typed(content), repeat)
+    print(f"{'excel':<12} {len(content) / 1e6:>8.1f} MB  baseline {baseline:>7.3f}s  "
+          f"typed {typed:>7.3f}s  cached {cached:>7.4f}s  speedup x{baseline / cached:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in the large CSV")
+    parser.add_argument("--wide-rows", type=int, default=20_000, help="rows in the wide CSV")
+    parser.add_argument("--wide-cols", type=int, default=300, help="unused columns in the wide CSV")
+    parser.add_argument("--excel-rows", type=int, default=20_000, help="rows in the Excel sheet")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"CSV engine: {ingest.CSV_ENGINE}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        ingest.CACHE_DIR = tmp_dir / "cache"
+
+        wide = tmp_dir / "wide.csv"
+        make_frame(args.wide_rows, args.wide_cols).to_csv(wide, index=False)
+        bench_csv("wide csv", wide, args.repeat)
+
+        large = tmp_dir / "large.csv"
+        make_frame(args.rows, 4).to_csv(large, index=False)
+        bench_csv("large csv", large, args.repeat)
+
+        excel = tmp_dir / "sheet.xlsx"
+        make_frame(args.excel_rows, 10).to_excel(excel, index=False)
+        bench_excel(excel, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
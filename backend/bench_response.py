@@ -0,0 +1,85 @@
+"""
+Benchmark /upload-file response size and serialization time.
+
+Builds a noisy ledger with many expense spikes and compares:
+    - baseline: every anomaly inline, FastAPI's jsonable_encoder + stdlib json
+    - bounded:  top-K anomalies inline, encoded with the fast response class
+and reports raw and gzip-compressed sizes for both.
+
+Usage:
+    python bench_response.py [--rows 1000000] [--spike-rate 0.02]
+"""
+import argparse
+import gzip
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from analysis import analyze_financial_file, anomaly_items, detect_anomalies
+from responses import FastJSONResponse, orjson
+
+def make_ledger(rows: int, spike_rate: float, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    expense = rng.normal(80_000, 5_000, rows)
+    spikes = rng.random(rows) < spike_rate
+    expense[spikes] *= rng.uniform(2, 5, spikes.sum())
+    return pd.DataFrame({
+        "income": rng.normal(100_000, 10_000, rows),
+        "expense": expense,
+        "donations": rng.normal(20_000, 3_000, rows),
+    })
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label: str, seconds: float, body: bytes) -> None:
+    compressed = gzip.compress(body, compresslevel=9)
+    print(f"{label:<10} serialize {seconds * 1000:>9.1f} ms  "
+          f"raw {len(body) / 1e3:>10.1f} KB  gzip {len(compressed) / 1e3:>9.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--spike-rate", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_ledger(args.rows, args.spike_rate)
+    rows, values = detect_anomalies(df)
+    print(f"Ledger rows: {args.rows:,}  anomalies: {len(rows):,}  "
+          f"orjson: {'yes' if orjson else 'no'}")
+
+    baseline_payload = {
+        "status": "success",
+        "rows_processed": len(df),
+        "analysis": {**analyze_financial_file(df, anomalies=(rows, values)),
+                     "anomalies": anomaly_items(rows, values)},
+    }
+    seconds, body = timed(
+        lambda: json.dumps(jsonable_encoder(baseline_payload)).encode("utf-8"), args.repeat
+    )
+    report("baseline", seconds, body)
+
+    bounded_payload = {
+        "status": "success",
+        "rows_processed": len(df),
+        "upload_id": 1,
+        "analysis": analyze_financial_file(df, anomalies=(rows, values)),
+    }
+    seconds, body = timed(lambda: FastJSONResponse(bounded_payload).body, args.repeat)
+    report("bounded", seconds, body)
+
+
+if __name__ == "__main__":
+    main()
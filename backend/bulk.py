@@ -0,0 +1,220 @@
+import asyncio
+import io
+import math
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Tuple
+
+from analysis import analyze_financial_file, detect_anomalies
+from ingest import CSV_EXTENSIONS, EXCEL_EXTENSIONS, load_financial_file
+
+# -------------------------------
+#  BULK UPLOAD SETTINGS
+# -------------------------------
+
+MAX_BULK_FILES = 200
+# Guard against zip bombs: total size of all members once extracted
+MAX_UNCOMPRESSED_BYTES = 500 * 1024 * 1024
+
+# Workers must not be fork()ed from the multi-threaded server process
+# (children can deadlock on locks held by other threads); they only need
+# analysis/ingest, so a fresh interpreter is cheap.
+MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_pool = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Worker processes are started on first use and reused across requests."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=MP_CONTEXT)
+    return _pool
+
+
+def discard_pool(pool: ProcessPoolExecutor):
+    """Forget a broken pool so the next request starts fresh workers."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+# -------------------------------
+#  ARCHIVE EXPANSION
+# -------------------------------
+def expand_uploads(files: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """
+    Turn the uploaded files into a flat list of (name, content) ledgers.
+    .zip uploads are replaced by their CSV/Excel members; folders and
+    hidden/metadata entries inside archives are skipped.
+
+    Raises ValueError for corrupt archives or when the limits are exceeded.
+    """
+    members: List[Tuple[str, bytes]] = []
+    total = 0
+    for name, content in files:
+        if not name.lower().endswith(".zip"):
+            members.append((name, content))
+            total += len(content)
+            continue
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                for info in archive.infolist():
+                    path = PurePosixPath(info.filename)
+                    if info.is_dir() or any(part.startswith((".", "__MACOSX")) for part in path.parts):
+                        continue
+                    if not path.name.lower().endswith(CSV_EXTENSIONS + EXCEL_EXTENSIONS):
+                        continue
+                    total += info.file_size
+                    if total > MAX_UNCOMPRESSED_BYTES:
+                        raise ValueError(f"Archive contents exceed {MAX_UNCOMPRESSED_BYTES} bytes")
+                    members.append((f"{name}/{info.filename}", archive.read(info)))
+        except zipfile.BadZipFile:
+            raise ValueError(f"{name} is not a valid zip archive")
+
+        if len(members) > MAX_BULK_FILES:
+            break
+
+    if total > MAX_UNCOMPRESSED_BYTES:
+        raise ValueError(f"Uploaded files exceed {MAX_UNCOMPRESSED_BYTES} bytes")
+    if len(members) > MAX_BULK_FILES:
+        raise ValueError(f"Too many files: at most {MAX_BULK_FILES} ledgers per bulk upload")
+    if not members:
+        raise ValueError("No CSV or Excel files found in upload")
+    return members
+
+
+# -------------------------------
+#  PER-FILE ANALYSIS (runs in worker processes)
+# -------------------------------
+ROLLUP_FIELDS = ("total_income", "total_expense", "total_donations", "surplus_or_deficit", "stability_score")
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def analyze_member(name: str, content: bytes) -> Dict[str, Any]:
+    """
+    Parse and analyze one ledger. Never raises: failures are reported in
+    the result so one bad file does not sink the whole batch.
+    """
+    try:
+        df = load_financial_file(name, io.BytesIO(content))
+        anomaly_rows, anomaly_values = detect_anomalies(df)
+        insights = analyze_financial_file(df, anomalies=(anomaly_rows, anomaly_values))
+        # Overflowing values (e.g. 1e308 or a literal "inf") make totals
+        # non-finite; such a file cannot be stored or rolled up
+        bad = [key for key in ROLLUP_FIELDS if not is_number(insights.get(key))]
+        if bad:
+            return {"file": name, "status": "error",
+                    "detail": f"Non-finite result for {', '.join(bad)} (values too large or infinite)"}
+        return {
+            "file": name,
+            "status": "success",
+            "rows_processed": len(df),
+            "analysis": insights,
+            "_anomalies": (anomaly_rows.tolist(), anomaly_values.tolist()),
+        }
+    except ValueError as e:
+        return {"file": name, "status": "error", "detail": str(e)}
+    except Exception as e:
+        return {"file": name, "status": "error", "detail": f"Analysis failed: {e}"}
+
+
+WORKER_CRASHED = "Worker process crashed while analyzing this file (possibly out of memory)"
+
+
+async def analyze_members(members: List[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    """
+    Run analyze_member over all ledgers in the worker pool, keeping the
+    event loop free.
+
+    If a worker dies (e.g. OOM-killed), the shared pool breaks and every
+    unfinished file fails with it. The pool is discarded so later requests
+    get fresh workers, and the affected files are retried once, each in
+    its own single-worker process, so only the file that actually crashes
+    is reported as an error.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+
+    async def run_shared(name, content):
+        return await loop.run_in_executor(pool, analyze_member, name, content)
+
+    outcomes = await asyncio.gather(*[run_shared(*m) for m in members], return_exceptions=True)
+    if any(isinstance(o, BrokenProcessPool) for o in outcomes):
+        discard_pool(pool)
+
+    slots = asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def run_isolated(name, content):
+        async with slots:
+            solo = ProcessPoolExecutor(max_workers=1, mp_context=MP_CONTEXT)
+            try:
+                return await loop.run_in_executor(solo, analyze_member, name, content)
+            except BrokenProcessPool:
+                return {"file": name, "status": "error", "detail": WORKER_CRASHED}
+            finally:
+                solo.shutdown(wait=False)
+
+    broken = [i for i, o in enumerate(outcomes) if isinstance(o, BrokenProcessPool)]
+    retried = await asyncio.gather(*[run_isolated(*members[i]) for i in broken], return_exceptions=True)
+    for i, outcome in zip(broken, retried):
+        outcomes[i] = outcome
+
+    results = []
+    for (name, _), outcome in zip(members, outcomes):
+        if isinstance(outcome, BaseException):
+            results.append({"file": name, "status": "error", "detail": f"Analysis failed: {outcome}"})
+        else:
+            results.append(outcome)
+    return results
+
+
+# -------------------------------
+#  COMBINED ROLLUP
+# -------------------------------
+def rollup(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine successful files; missing or non-finite values are skipped, not summed."""
+    ok = [r for r in results if r["status"] == "success"]
+
+    def values(key):
+        return [r["analysis"].get(key) for r in ok if is_number(r["analysis"].get(key))]
+
+    total_income = sum(values("total_income"))
+    total_expense = sum(values("total_expense"))
+    total_donations = sum(values("total_donations"))
+    scores = values("stability_score")
+    return {
+        "files_total": len(results),
+        "files_succeeded": len(ok),
+        "files_failed": len(results) - len(ok),
+        "rows_processed": sum(r["rows_processed"] for r in ok),
+        "total_income": round(total_income, 2),
+        "total_expense": round(total_expense, 2),
+        "total_donations": round(total_donations, 2),
+        "surplus_or_deficit": round(total_income - total_expense, 2),
+        "donation_dependency_percent": round(total_donations / total_income * 100, 2) if total_income > 0 else 0,
+        "anomaly_count": sum(values("anomaly_count")),
+        "average_stability_score": round(sum(scores) / len(scores), 2) if scores else None,
+        "min_stability_score": min(scores) if scores else None,
+        "files_in_deficit": [
+            r["file"] for r in ok
+            if is_number(r["analysis"].get("surplus_or_deficit")) and r["analysis"]["surplus_or_deficit"] < 0
+        ],
+    }
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+import sqlite3
+from datetime import date
+from typing import Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# -------------------------------
+#  EXPORTABLE TABLES
+# -------------------------------
+
+EXPORT_BATCH_SIZE = 5000
+EXPORT_FORMATS = ("csv", "ndjson")
+
+EXPORT_TABLES = {
+    "uploads": {
+        "table": "ngo_financial_uploads",
+        "timestamp": "uploaded_at",
+        "columns": [
+            "id", "user_id", "total_income", "total_expense", "total_donations",
+            "surplus_or_deficit", "risk_level", "stability_score", "uploaded_at",
+        ],
+    },
+    "predictions": {
+        "table": "ngo_predictions",
+        "timestamp": "created_at",
+        "columns": [
+            "id", "user_id", "income", "expense", "donations",
+            "future_funding_required", "confidence_score", "risk_level", "created_at",
+        ],
+    },
+}
+
+
+def resolve_table(name: str) -> dict:
+    """Accept either the short name ("uploads") or the table name ("ngo_financial_uploads")."""
+    for key, spec in EXPORT_TABLES.items():
+        if name in (key, spec["table"]):
+            return spec
+    raise ValueError(f"Unknown table '{name}'. Choose from: {list(EXPORT_TABLES)}")
+
+
+def build_query(spec: dict, since: Optional[str] = None, until: Optional[str] = None,
+                user_id: Optional[int] = None):
+    """
+    Keyset-batched SELECT for one export. `since`/`until` are inclusive
+    YYYY-MM-DD dates. The caller binds the last id already sent as the
+    first parameter and the batch size as the last; rows come back in id
+    order along the primary key.
+    """
+    clauses, params = ["id > ?"], []
+    ts = spec["timestamp"]
+    if since:
+        clauses.append(f"{ts} >= ?")
+        params.append(date.fromisoformat(since).isoformat())
+    if until:
+        clauses.append(f"{ts} < date(?, '+1 day')")
+        params.append(date.fromisoformat(until).isoformat())
+    if user_id is not None:
+        clauses.append("user_id = ?")
+        params.append(int(user_id))
+
+    sql = (
+        f"SELECT {', '.join(spec['columns'])} FROM {spec['table']} "
+        f"WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?"
+    )
+    return sql, params
+
+
+# -------------------------------
+#  ROW ENCODERS
+# -------------------------------
+def encode_csv(rows, columns=None) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    if columns:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def encode_ndjson(rows, columns) -> str:
+    if orjson is not None:
+        return "".join(orjson.dumps(dict(zip(columns, r))).decode() + "\n" for r in rows)
+    return "".join(json.dumps(dict(zip(columns, r)), separators=(",", ":")) + "\n" for r in rows)
+
+
+# -------------------------------
+#  STREAMING EXPORT
+# -------------------------------
+def iter_export(conn: sqlite3.Connection, table: str, fmt: str = "csv",
+                since: Optional[str] = None, until: Optional[str] = None,
+                user_id: Optional[int] = None,
+                batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Yield the export as text chunks, one per `batch_size` rows, so memory
+    stays constant regardless of table size. Each batch is its own short
+    keyset query run to completion, so no read lock is held while the
+    client downloads and concurrent inserts are not blocked.
+    The connection is closed once the generator finishes.
+
+    Raises ValueError for an unknown table/format or a malformed date,
+    before any output is produced.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {list(EXPORT_FORMATS)}")
+    spec = resolve_table(table)
+    sql, params = build_query(spec, since, until, user_id)
+    columns = spec["columns"]
+
+    def fetch_batch(last_id):
+        return conn.execute(sql, [last_id, *params, batch_size]).fetchall()
+
+    # First batch runs eagerly so a missing table fails before streaming starts
+    first = fetch_batch(-1)
+
+    def generate():
+        try:
+            if fmt == "csv":
+                yield encode_csv([], columns)
+            rows = first
+            while rows:
+                if fmt == "csv":
+                    yield encode_csv(rows)
+                else:
+                    yield encode_ndjson(rows, columns)
+                if len(rows) < batch_size:
+                    break
+                rows = fetch_batch(rows[-1][0])
+        finally:
+            conn.close()
+
+    return generate()
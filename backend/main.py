@@ -1,10 +1,18 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import RedirectResponse, StreamingResponse
 from pydantic import BaseModel
-import pandas as pd
-from analysis import analyze_financial_file
+from admission import AdmissionControlMiddleware, EndpointLimit
+from analysis import analyze_financial_file, anomaly_items, detect_anomalies, json_safe
+from bulk import analyze_members, expand_uploads, rollup, shutdown_pool
+from export import iter_export
+from ingest import load_financial_file
 from predict import predict_finance
+from responses import FastJSONResponse
+from static_assets import ASSETS, asset_response, etag_matches, load_assets
 from pathlib import Path
+import asyncio
 import sqlite3
 import hashlib
 import secrets
@@ -68,6 +76,19 @@ def create_tables():
         """
     )
     
+    # Full anomaly lists per upload (paged via /uploads/{upload_id}/anomalies)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ngo_upload_anomalies (
+            upload_id INTEGER NOT NULL,
+            row INTEGER NOT NULL,
+            expense REAL,
+            PRIMARY KEY (upload_id, row),
+            FOREIGN KEY (upload_id) REFERENCES ngo_financial_uploads(id)
+        ) WITHOUT ROWID
+        """
+    )
+    
     conn.commit()
     conn.close()
 
@@ -80,7 +101,7 @@ def verify_password(password: str, hash: str) -> bool:
     return hash_password(password) == hash
 
 from fastapi import Depends
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 app = FastAPI(
     title="FinEase - AI Financial Analyst",
@@ -88,6 +109,17 @@ app = FastAPI(
     version="2.0"
 )
 
+# --- Admission control for expensive endpoints ---
+# Checked before the body is parsed; saturated endpoints shed with 429/503.
+ADMISSION_LIMITS = {
+    "/upload-file": EndpointLimit(max_concurrent=2, max_queue=8, queue_timeout=10.0, max_body_bytes=50 * 1024 * 1024),
+    "/upload-bulk": EndpointLimit(max_concurrent=1, max_queue=4, queue_timeout=30.0, max_body_bytes=200 * 1024 * 1024),
+    "/predict": EndpointLimit(max_concurrent=8, max_queue=64, queue_timeout=2.0, max_body_bytes=16 * 1024),
+}
+ADMISSION_METRICS: Dict[str, Any] = {}
+
+app.add_middleware(AdmissionControlMiddleware, limits=ADMISSION_LIMITS, metrics=ADMISSION_METRICS)
+
 # --- CORS (Allow frontend to call backend) ---
 app.add_middleware(
     CORSMiddleware,
@@ -96,6 +128,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Compress large JSON responses (upload analyses, history lists) ---
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # --- Database setup on startup ---
 @app.on_event("startup")
 def startup_event():
@@ -104,6 +139,13 @@ def startup_event():
     except Exception as e:
         # Avoid crashing startup if table creation fails; surface via health
         print(f"[DB] Startup table creation failed: {e}")
+    # Read + precompress the frontend once instead of per request
+    load_assets()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    shutdown_pool()
 
 
 # ----------------------------
@@ -133,7 +175,10 @@ def root():
         "message": "FinEase Backend Running Successfully",
         "endpoints": {
             "/predict": "Predict funding requirement",
+            "/app/": "Web interface",
             "/upload-file": "Upload NGO financial CSV/Excel for analysis",
+            "/upload-bulk": "Upload a zip or many CSV/Excel files for parallel analysis",
+            "/export": "Stream uploads/predictions history as CSV or NDJSON",
             "/health": "Check backend health"
         }
     }
@@ -147,6 +192,17 @@ def health_check():
     return {"status": "OK", "server": "running"}
 
 
+# ----------------------------
+#  ADMISSION METRICS
+# ----------------------------
+@app.get("/metrics")
+def admission_metrics():
+    return {
+        "status": "success",
+        "endpoints": {path: m.snapshot() for path, m in ADMISSION_METRICS.items()}
+    }
+
+
 # ----------------------------
 #  AUTHENTICATION ENDPOINTS
 # ----------------------------
@@ -276,72 +332,151 @@ def predict_route(data: FinanceInput):
 # ----------------------------
 #  FILE UPLOAD + ANALYSIS
 # ----------------------------
+def insert_upload(cur, insights: Dict[str, Any], anomaly_rows, anomaly_values) -> int:
+    """Insert one upload summary and its anomalies; the caller commits."""
+    cur.execute(
+        """
+        INSERT INTO ngo_financial_uploads (
+            total_income, total_expense, total_donations, surplus_or_deficit, risk_level, stability_score
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            float(insights.get("total_income", 0.0)),
+            float(insights.get("total_expense", 0.0)),
+            float(insights.get("total_donations", 0.0)),
+            float(insights.get("surplus_or_deficit", 0.0)),
+            str(insights.get("risk_level", "Unknown")),
+            float(insights.get("stability_score", 0.0))
+        )
+    )
+    upload_id = cur.lastrowid
+    cur.executemany(
+        "INSERT INTO ngo_upload_anomalies (upload_id, row, expense) VALUES (?, ?, ?)",
+        zip([upload_id] * len(anomaly_rows), anomaly_rows, anomaly_values)
+    )
+    return upload_id
+
+
 @app.post("/upload-file")
 async def upload_file(file: UploadFile = File(...)):
-    filename = file.filename.lower()
-
     try:
-        # --- Read CSV or Excel automatically ---
-        if filename.endswith(".csv"):
-            df = pd.read_csv(file.file)
-        elif filename.endswith(".xlsx") or filename.endswith(".xls"):
-            df = pd.read_excel(file.file)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Unsupported file type. Upload CSV or Excel."
-            )
-
-        # --- Validate Required Columns ---
-        required_cols = {"income", "expense", "donations"}
-        if not required_cols.issubset(df.columns):
-            raise HTTPException(
-                status_code=400,
-                detail=f"File missing required columns: {required_cols}"
-            )
+        # --- Header check first, then typed parse of required columns only ---
+        try:
+            df = load_financial_file(file.filename, file.file)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         # --- Perform Analysis ---
-        insights = analyze_financial_file(df)
+        anomaly_rows, anomaly_values = detect_anomalies(df)
+        insights = analyze_financial_file(df, anomalies=(anomaly_rows, anomaly_values))
 
-        # Persist insights summary to DB
+        # Persist insights summary + full anomaly list to DB
+        upload_id = None
         try:
             conn = get_db()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO ngo_financial_uploads (
-                    total_income, total_expense, total_donations, surplus_or_deficit, risk_level, stability_score
-                ) VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    float(insights.get("total_income", 0.0)),
-                    float(insights.get("total_expense", 0.0)),
-                    float(insights.get("total_donations", 0.0)),
-                    float(insights.get("surplus_or_deficit", 0.0)),
-                    str(insights.get("risk_level", "Unknown")),
-                    float(insights.get("stability_score", 0.0))
-                )
-            )
+            upload_id = insert_upload(conn.cursor(), insights, anomaly_rows.tolist(), anomaly_values.tolist())
             conn.commit()
             conn.close()
         except Exception as db_err:
+            upload_id = None
             print(f"[DB] Failed to persist upload insights: {db_err}")
 
-        return {
+        # Bypass FastAPI's generic encoder; the payload is already JSON-native
+        return FastJSONResponse({
             "status": "success",
             "rows_processed": len(df),
-            "analysis": insights
-        }
+            "upload_id": upload_id,
+            "analysis": json_safe(insights)
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+# ----------------------------
+#  BULK UPLOAD (zip archive or many files)
+# ----------------------------
+@app.post("/upload-bulk")
+async def upload_bulk(files: List[UploadFile] = File(...)):
+    """
+    Analyze many ledgers in parallel worker processes. Zip uploads are
+    expanded to their CSV/Excel members. All successful summaries are
+    written to ngo_financial_uploads in a single transaction.
+    """
+    try:
+        uploaded = [(f.filename, await f.read()) for f in files]
+        # Decompression can be hundreds of MB; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        try:
+            members = await loop.run_in_executor(None, expand_uploads, uploaded)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # --- Fan out across cores; the event loop stays free meanwhile ---
+        results = await analyze_members(members)
+
+        # --- One transaction for the whole batch ---
+        anomalies = [r.pop("_anomalies", None) for r in results]
+        conn = None
+        try:
+            conn = get_db()
+            cur = conn.cursor()
+            for result, found in zip(results, anomalies):
+                if result["status"] == "success":
+                    result["upload_id"] = insert_upload(cur, result["analysis"], *found)
+            conn.commit()
+            conn.close()
+        except Exception as db_err:
+            if conn is not None:
+                conn.rollback()
+                conn.close()
+            for result in results:
+                result.pop("upload_id", None)
+            print(f"[DB] Failed to persist bulk upload insights: {db_err}")
+
+        summary = rollup(results)
+        for result in results:
+            if "analysis" in result:
+                result["analysis"] = json_safe(result["analysis"])
+
+        return FastJSONResponse({
+            "status": "success",
+            "rollup": summary,
+            "files": results
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ----------------------------
+#  HISTORY ETAGS
+# ----------------------------
+def history_etag(cur, table: str, limit: int) -> str:
+    """
+    History rows are insert-only (AUTOINCREMENT ids never repeat), so the
+    highest id identifies the table's state. MAX(id) is a single rowid
+    b-tree lookup, not a table scan.
+    """
+    cur.execute(f"SELECT MAX(id) FROM {table}")
+    (max_id,) = cur.fetchone()
+    digest = hashlib.sha256(f"{table}:{max_id}:{limit}".encode()).hexdigest()[:16]
+    # Weak: GZipMiddleware may compress the body under the same validator
+    return f'W/"{digest}"'
+
+
 # ----------------------------
 #  LIST RECENT UPLOADS
 # ----------------------------
 @app.get("/uploads")
-def list_uploads(limit: int = 20):
+def list_uploads(request: Request, limit: int = 20):
     try:
         conn = get_db()
         cur = conn.cursor()
+        etag = history_etag(cur, "ngo_financial_uploads", limit)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            conn.close()
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
         cur.execute(
             """
             SELECT id, total_income, total_expense, total_donations, surplus_or_deficit, risk_level, stability_score, uploaded_at
@@ -366,7 +501,55 @@ def list_uploads(limit: int = 20):
             }
             for r in rows
         ]
-        return {"status": "success", "items": uploads}
+        return FastJSONResponse(
+            {"status": "success", "items": uploads},
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ----------------------------
+#  PAGINATED ANOMALIES FOR ONE UPLOAD
+# ----------------------------
+@app.get("/uploads/{upload_id}/anomalies")
+def list_upload_anomalies(upload_id: int, cursor: int = -1, limit: int = 500):
+    """
+    Keyset-paginated anomaly list in row order. Pass the returned
+    `next_cursor` back as `cursor` until it is null.
+    """
+    limit = max(1, min(limit, 5000))
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        # Distinguish "no such upload" from "upload with no anomalies"
+        cur.execute("SELECT 1 FROM ngo_financial_uploads WHERE id = ?", (upload_id,))
+        if cur.fetchone() is None:
+            conn.close()
+            raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+        cur.execute(
+            """
+            SELECT row, expense
+            FROM ngo_upload_anomalies
+            WHERE upload_id = ? AND row > ?
+            ORDER BY row
+            LIMIT ?
+            """,
+            (upload_id, cursor, limit + 1)
+        )
+        rows = cur.fetchall()
+        conn.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = anomaly_items([r[0] for r in rows], [r[1] for r in rows])
+        return FastJSONResponse({
+            "status": "success",
+            "upload_id": upload_id,
+            "items": items,
+            "next_cursor": rows[-1][0] if has_more else None
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -374,10 +557,14 @@ def list_uploads(limit: int = 20):
 #  LIST RECENT PREDICTIONS
 # ----------------------------
 @app.get("/predictions")
-def list_predictions(limit: int = 20):
+def list_predictions(request: Request, limit: int = 20):
     try:
         conn = get_db()
         cur = conn.cursor()
+        etag = history_etag(cur, "ngo_predictions", limit)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            conn.close()
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
         cur.execute(
             """
             SELECT id, income, expense, donations, future_funding_required, confidence_score, risk_level, created_at
@@ -403,6 +590,65 @@ def list_predictions(limit: int = 20):
             }
             for r in rows
         ]
-        return {"status": "success", "items": items}
+        return FastJSONResponse(
+            {"status": "success", "items": items},
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ----------------------------
+#  STREAMING HISTORY EXPORT
+# ----------------------------
+@app.get("/export")
+def export_table(
+    table: str = "predictions",
+    format: str = "csv",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    user_id: Optional[int] = None,
+):
+    """
+    Stream all of ngo_predictions or ngo_financial_uploads in fixed-size
+    batches. `since`/`until` are inclusive YYYY-MM-DD dates.
+    """
+    conn = get_db()
+    try:
+        chunks = iter_export(conn, table, format, since=since, until=until, user_id=user_id)
+    except ValueError as e:
+        conn.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        conn.close()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{table}.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ----------------------------
+#  FRONTEND (cached, precompressed)
+# ----------------------------
+@app.get("/app", include_in_schema=False)
+def frontend_root():
+    return RedirectResponse("/app/")
+
+
+@app.get("/app/{asset_path:path}", include_in_schema=False)
+def frontend_asset(asset_path: str, request: Request):
+    if not ASSETS:
+        load_assets()
+    asset = ASSETS.get(asset_path or "index.html")
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return asset_response(
+        asset,
+        request.headers.get("if-none-match"),
+        request.headers.get("accept-encoding")
+    )
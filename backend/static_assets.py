@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# -------------------------------
+#  FRONTEND ASSET SETTINGS
+# -------------------------------
+
+FRONTEND_DIR = Path(__file__).resolve().parents[1] / "frontend"
+ASSET_SUFFIXES = (".html", ".js", ".css")
+
+# Hashed filenames never change content → cache for a year.
+# Plain names (pages, and script.js for old links) must revalidate via ETag.
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+class Asset:
+    """One frontend file held in memory with its precompressed variants."""
+
+    def __init__(self, name: str, content: bytes, cache_control: str):
+        self.name = name
+        self.cache_control = cache_control
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or name.endswith(".js"):
+            self.media_type += "; charset=utf-8"
+
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        # Strong ETags must differ per encoding, so each variant gets a suffix
+        self.variants: Dict[str, bytes] = {"identity": content}
+        self.etags: Dict[str, str] = {"identity": f'"{digest}"'}
+
+        self.variants["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+        self.etags["gzip"] = f'"{digest}-gz"'
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(content, quality=11)
+            self.etags["br"] = f'"{digest}-br"'
+
+
+# name -> Asset, filled by load_assets() at startup
+ASSETS: Dict[str, Asset] = {}
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    stem, _, suffix = name.rpartition(".")
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}.{suffix}"
+
+
+def load_assets(frontend_dir: Path = FRONTEND_DIR) -> Dict[str, Asset]:
+    """
+    Read the frontend into memory, precompressing each file once.
+    Scripts/styles are also published under content-hashed names, and
+    the HTML pages are rewritten to reference those names.
+    """
+    ASSETS.clear()
+    if not frontend_dir.is_dir():
+        print(f"[STATIC] Frontend directory not found at {frontend_dir}")
+        return ASSETS
+
+    files = {p.name: p.read_bytes() for p in sorted(frontend_dir.iterdir())
+             if p.is_file() and p.suffix in ASSET_SUFFIXES}
+
+    renames = {}
+    for name, content in files.items():
+        if not name.endswith(".html"):
+            renames[name] = hashed_name(name, content)
+            ASSETS[renames[name]] = Asset(renames[name], content, IMMUTABLE_CACHE)
+            ASSETS[name] = Asset(name, content, REVALIDATE_CACHE)
+
+    for name, content in files.items():
+        if name.endswith(".html"):
+            html = content.decode("utf-8")
+            for original, hashed in renames.items():
+                html = re.sub(rf'((?:src|href)=["\']){re.escape(original)}(["\'])', rf"\g<1>{hashed}\g<2>", html)
+            ASSETS[name] = Asset(name, html.encode("utf-8"), REVALIDATE_CACHE)
+
+    return ASSETS
+
+
+# -------------------------------
+#  CONDITIONAL REQUEST HELPERS
+# -------------------------------
+def etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    """
+    True when an If-None-Match header matches any of the given ETags.
+    Uses weak comparison (W/ prefixes ignored on both sides), as RFC 9110
+    requires for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    candidates = {strip_weak(tag.strip()) for tag in if_none_match.split(",")}
+    return "*" in candidates or any(strip_weak(etag) in candidates for etag in etags)
+
+
+def strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def pick_encoding(accept_encoding: Optional[str], asset: Asset) -> str:
+    """Prefer brotli, then gzip, when the client accepts them and a variant exists."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def asset_response(asset: Asset, if_none_match: Optional[str], accept_encoding: Optional[str]) -> Response:
+    """Serve the best encoded variant, or 304 when the client's copy is current."""
+    encoding = pick_encoding(accept_encoding, asset)
+    headers = {
+        "ETag": asset.etags[encoding],
+        "Cache-Control": asset.cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(if_none_match, *asset.etags.values()):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(asset.variants[encoding], media_type=asset.media_type, headers=headers)
@@ -1,47 +1,51 @@
+import argparse
 import pickle
+import time
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import SGDRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.model_selection import cross_val_score, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 
 DATA_PATH = Path(__file__).resolve().parent / "ngo_large_1000.csv"
 
+BASE_COLS = ["income", "expense", "donations"]
+FEATURE_COLS = BASE_COLS + ["surplus", "donation_ratio", "expense_to_income"]
+TARGET_COL = "future_fund_need"
+
 
-def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+def feature_engineering(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    if not inplace:
+        df = df.copy()
     df["surplus"] = df["income"] - df["expense"]
     df["donation_ratio"] = df["donations"] / df["income"]
     df["expense_to_income"] = df["expense"] / df["income"]
     return df
 
 
-def main():
-    if not DATA_PATH.exists():
-        raise FileNotFoundError(f"Dataset not found at {DATA_PATH}")
-
-    df = pd.read_csv(DATA_PATH)
+def train_in_memory(data_path: Path):
+    df = pd.read_csv(data_path)
     df = feature_engineering(df).dropna()
 
-    feature_cols = [
-        "income",
-        "expense",
-        "donations",
-        "surplus",
-        "donation_ratio",
-        "expense_to_income",
-    ]
+    feature_cols = FEATURE_COLS
 
     X = df[feature_cols]
-    y = df["future_fund_need"].astype(float)
+    y = df[TARGET_COL].astype(float)
 
-    base_cols = ["income", "expense", "donations"]
+    base_cols = BASE_COLS
 
     preprocessor = ColumnTransformer(
         transformers=[("scale_base", StandardScaler(), base_cols)],
@@ -109,7 +113,10 @@ def main():
 
     scaler = best_pipe.named_steps["preprocess"].named_transformers_["scale_base"]
     model = best_pipe.named_steps["model"]
+    save_artifacts(model, scaler, feature_cols)
 
+
+def save_artifacts(model, scaler, feature_cols):
     with open("model.pkl", "wb") as f:
         pickle.dump(model, f)
 
@@ -125,5 +132,225 @@ def main():
     print(" - feature_list.pkl")
 
 
+# ----------------------------
+#  OUT-OF-CORE (STREAMING) TRAINING
+# ----------------------------
+# Every HOLDOUT_EVERY-th row (by position in the file) is held out for
+# evaluation, so the split is deterministic without shuffling the file.
+HOLDOUT_EVERY = 5
+
+
+def iter_chunks(data_path: Path, chunksize: int):
+    """
+    Yield (features, target, is_test) per chunk, reading only the needed
+    columns as float64. Memory use is bounded by `chunksize`.
+    """
+    offset = 0
+    reader = pd.read_csv(
+        data_path,
+        usecols=BASE_COLS + [TARGET_COL],
+        dtype={col: "float64" for col in BASE_COLS + [TARGET_COL]},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        is_test = (np.arange(offset, offset + len(chunk)) % HOLDOUT_EVERY) == 0
+        offset += len(chunk)
+        chunk = feature_engineering(chunk, inplace=True)
+        valid = chunk.notna().all(axis=1).to_numpy()
+        yield (
+            chunk.loc[valid, FEATURE_COLS].to_numpy(),
+            chunk.loc[valid, TARGET_COL].to_numpy(),
+            is_test[valid],
+        )
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB. Unlike tracemalloc
+    this includes native allocations (sklearn tree building, pandas parser
+    buffers). Returns None where it cannot be measured.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1e6
+    except (ImportError, AttributeError):
+        return None
+
+
+class PassStats:
+    """Wall time per chunk and process peak RSS after one pass over the data."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.chunk_times = []
+
+    def __enter__(self):
+        self._last = time.perf_counter()
+        return self
+
+    def tick(self):
+        now = time.perf_counter()
+        self.chunk_times.append(now - self._last)
+        self._last = now
+
+    def __exit__(self, *exc):
+        peak = peak_rss_mb()
+        times = np.array(self.chunk_times or [0.0])
+        print(
+            f"[{self.name}] chunks: {len(self.chunk_times)}  "
+            f"total: {times.sum():.2f}s  per chunk: {times.mean() * 1000:.1f} ms (max {times.max() * 1000:.1f} ms)  "
+            f"peak RSS: {'n/a' if peak is None else f'{peak:.1f} MB'}"
+        )
+        return False
+
+
+def scale_base(scaler: StandardScaler, X: np.ndarray) -> np.ndarray:
+    """Apply the base-column scaler the same way predict.py does."""
+    X = X.copy()
+    X[:, :3] = scaler.transform(X[:, :3])
+    return X
+
+
+def train_streaming(data_path: Path, learner: str, chunksize: int, epochs: int, reservoir_size: int):
+    """
+    Train without ever holding the full dataset in memory.
+
+    Pass 1 fits the base-column scaler with partial_fit (and fills a
+    reservoir sample when learner == "reservoir"). The model is then
+    either an SGDRegressor trained incrementally over `epochs` passes,
+    or the random forest from the in-memory mode fitted on the sample.
+    A final pass scores the held-out rows.
+    """
+    rng = np.random.default_rng(42)
+    scaler = StandardScaler()
+    seen = 0
+
+    with PassStats("scaler") as stats:
+        # Allocated inside the first pass so its memory shows up in that pass's report
+        if learner == "reservoir":
+            reservoir_X = np.empty((reservoir_size, len(FEATURE_COLS)))
+            reservoir_y = np.empty(reservoir_size)
+        for X, y, is_test in iter_chunks(data_path, chunksize):
+            X, y = X[~is_test], y[~is_test]
+            if len(X):
+                scaler.partial_fit(X[:, :3])
+            if learner == "reservoir":
+                seen = reservoir_update(reservoir_X, reservoir_y, X, y, seen, rng)
+            stats.tick()
+
+    if learner == "reservoir":
+        n = min(seen, reservoir_size)
+        print(f"Reservoir sample: {n:,} of {seen:,} training rows")
+        model = RandomForestRegressor(
+            n_estimators=500,
+            max_depth=12,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1,
+        )
+        with PassStats("fit") as stats:
+            model.fit(scale_base(scaler, reservoir_X[:n]), reservoir_y[:n])
+            stats.tick()
+    else:
+        model = train_sgd(data_path, scaler, chunksize, epochs)
+
+    mae, r2 = evaluate_streaming(data_path, scaler, model, chunksize)
+    print("Model training complete.")
+    print(f"Selected model: {learner} (streaming)")
+    print(f"Test MAE: {mae:.2f}")
+    print(f"Test R2 : {r2:.2f}")
+
+    save_artifacts(model, scaler, FEATURE_COLS)
+
+
+def reservoir_update(res_X, res_y, X, y, seen, rng):
+    """Vectorized Algorithm R: keep a uniform sample of every row seen so far."""
+    k = len(res_y)
+    fill = max(0, min(k - seen, len(X)))
+    res_X[seen:seen + fill] = X[:fill]
+    res_y[seen:seen + fill] = y[:fill]
+
+    rest = np.arange(seen + fill, seen + len(X))
+    if len(rest):
+        slots = rng.integers(0, rest + 1)
+        keep = slots < k
+        # Later rows overwrite earlier ones in the same slot, as in the sequential algorithm
+        res_X[slots[keep]] = X[fill:][keep]
+        res_y[slots[keep]] = y[fill:][keep]
+    return seen + len(X)
+
+
+def train_sgd(data_path: Path, scaler: StandardScaler, chunksize: int, epochs: int):
+    """
+    Incremental linear model. The engineered columns are left unscaled by
+    predict.py, so the pipeline standardizes all six inputs itself; that
+    scaler gets its own pass because it sees base columns after scaling.
+    """
+    input_scaler = StandardScaler()
+    with PassStats("input scaler") as stats:
+        for X, _, is_test in iter_chunks(data_path, chunksize):
+            if (~is_test).any():
+                input_scaler.partial_fit(scale_base(scaler, X[~is_test]))
+            stats.tick()
+
+    sgd = SGDRegressor(learning_rate="invscaling", eta0=0.01, random_state=42)
+    for epoch in range(epochs):
+        with PassStats(f"sgd epoch {epoch + 1}") as stats:
+            for X, y, is_test in iter_chunks(data_path, chunksize):
+                if (~is_test).any():
+                    sgd.partial_fit(input_scaler.transform(scale_base(scaler, X[~is_test])), y[~is_test])
+                stats.tick()
+
+    return Pipeline([("scale_inputs", input_scaler), ("model", sgd)])
+
+
+def evaluate_streaming(data_path: Path, scaler: StandardScaler, model, chunksize: int):
+    """MAE and R2 on the held-out rows, accumulated chunk by chunk."""
+    n = 0
+    abs_err = sq_err = y_sum = y_sq_sum = 0.0
+    with PassStats("evaluate") as stats:
+        for X, y, is_test in iter_chunks(data_path, chunksize):
+            X, y = X[is_test], y[is_test]
+            if len(X):
+                preds = model.predict(scale_base(scaler, X))
+                n += len(y)
+                abs_err += float(np.abs(y - preds).sum())
+                sq_err += float(((y - preds) ** 2).sum())
+                y_sum += float(y.sum())
+                y_sq_sum += float((y ** 2).sum())
+            stats.tick()
+
+    if n == 0:
+        return float("nan"), float("nan")
+    total_var = y_sq_sum - y_sum ** 2 / n
+    r2 = 1.0 - sq_err / total_var if total_var > 0 else float("nan")
+    return abs_err / n, r2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the FinEase funding model.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="training CSV")
+    parser.add_argument("--streaming", action="store_true",
+                        help="out-of-core mode: read the CSV in chunks instead of loading it whole")
+    parser.add_argument("--learner", choices=["sgd", "reservoir"], default="sgd",
+                        help="streaming model: incremental SGDRegressor, or a random forest on a reservoir sample")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--epochs", type=int, default=3, help="SGD passes over the data")
+    parser.add_argument("--reservoir-size", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if not args.data.exists():
+        raise FileNotFoundError(f"Dataset not found at {args.data}")
+
+    if args.streaming:
+        train_streaming(args.data, args.learner, args.chunksize, args.epochs, args.reservoir_size)
+    else:
+        train_in_memory(args.data)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,4 +1,5 @@
-const API_BASE = "http://127.0.0.1:8080"; // Backend port (updated)
+// Same origin when served by the backend at /app/, else the standalone backend port
+const API_BASE = window.location.pathname.startsWith("/app/") ? window.location.origin : "http://127.0.0.1:8080";
 
 let financialOverviewChart;
 let donationChart;
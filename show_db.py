@@ -1,52 +1,108 @@
+import argparse
 import sqlite3
 import os
+import sys
 
 db_path = os.path.join(os.path.dirname(__file__), 'database', 'ngo_finance.db')
 
-try:
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    
-    # Get all tables
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = [row[0] for row in cur.fetchall()]
-    print('='*60)
-    print(f'Tables found: {tables}')
-    print('='*60)
-    print()
+# Reuse the backend export module (backend/ is not a package)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_TABLES, iter_export
+
+
+def show_recent():
+    try:
+        conn = sqlite3.connect(db_path)
+        cur = conn.cursor()
     
-    # Show uploads
-    if 'ngo_financial_uploads' in tables:
-        print('=== ngo_financial_uploads (Recent 5) ===')
-        cur.execute('''SELECT id, total_income, total_expense, total_donations, 
-                              surplus_or_deficit, risk_level, stability_score, uploaded_at 
-                       FROM ngo_financial_uploads ORDER BY uploaded_at DESC LIMIT 5''')
-        cols = [description[0] for description in cur.description]
-        print(f"Columns: {cols}")
-        for row in cur.fetchall():
-            print(row)
-        print()
-    else:
-        print('No ngo_financial_uploads table')
+        # Get all tables
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = [row[0] for row in cur.fetchall()]
+        print('='*60)
+        print(f'Tables found: {tables}')
+        print('='*60)
         print()
     
-    # Show predictions
-    if 'ngo_predictions' in tables:
-        print('=== ngo_predictions (Recent 5) ===')
-        cur.execute('''SELECT id, income, expense, donations, future_funding_required, 
-                              confidence_score, risk_level, created_at 
-                       FROM ngo_predictions ORDER BY created_at DESC LIMIT 5''')
-        cols = [description[0] for description in cur.description]
-        print(f"Columns: {cols}")
-        for row in cur.fetchall():
-            print(row)
-    else:
-        print('No ngo_predictions table')
+        # Show uploads
+        if 'ngo_financial_uploads' in tables:
+            print('=== ngo_financial_uploads (Recent 5) ===')
+            cur.execute('''SELECT id, total_income, total_expense, total_donations, 
+                                  surplus_or_deficit, risk_level, stability_score, uploaded_at 
+                           FROM ngo_financial_uploads ORDER BY uploaded_at DESC LIMIT 5''')
+            cols = [description[0] for description in cur.description]
+            print(f"Columns: {cols}")
+            for row in cur.fetchall():
+                print(row)
+            print()
+        else:
+            print('No ngo_financial_uploads table')
+            print()
+    
+        # Show predictions
+        if 'ngo_predictions' in tables:
+            print('=== ngo_predictions (Recent 5) ===')
+            cur.execute('''SELECT id, income, expense, donations, future_funding_required, 
+                                  confidence_score, risk_level, created_at 
+                           FROM ngo_predictions ORDER BY created_at DESC LIMIT 5''')
+            cols = [description[0] for description in cur.description]
+            print(f"Columns: {cols}")
+            for row in cur.fetchall():
+                print(row)
+        else:
+            print('No ngo_predictions table')
     
-    conn.close()
-    print()
-    print(f'Database location: {db_path}')
-except FileNotFoundError:
-    print(f'Database file not found at: {db_path}')
-except Exception as e:
-    print(f'Error: {e}')
+        conn.close()
+        print()
+        print(f'Database location: {db_path}')
+    except FileNotFoundError:
+        print(f'Database file not found at: {db_path}')
+    except Exception as e:
+        print(f'Error: {e}')
+
+
+def export(args):
+    if not os.path.exists(db_path):
+        print(f'Database file not found at: {db_path}', file=sys.stderr)
+        sys.exit(1)
+    conn = sqlite3.connect(db_path)
+    try:
+        chunks = iter_export(conn, args.table, args.format, since=args.since,
+                             until=args.until, user_id=args.user_id,
+                             batch_size=args.batch_size)
+    except ValueError as e:
+        conn.close()
+        print(f'Error: {e}', file=sys.stderr)
+        sys.exit(2)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or export the FinEase database.')
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('show', help='Show the 5 most recent uploads and predictions (default)')
+
+    exp = sub.add_parser('export', help='Stream a full history table as CSV or NDJSON')
+    exp.add_argument('table', choices=list(EXPORT_TABLES))
+    exp.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    exp.add_argument('--since', help='Inclusive start date (YYYY-MM-DD)')
+    exp.add_argument('--until', help='Inclusive end date (YYYY-MM-DD)')
+    exp.add_argument('--user-id', type=int)
+    exp.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    exp.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        export(args)
+    else:
+        show_recent()
+
+
+if __name__ == '__main__':
+    main()